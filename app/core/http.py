@@ -0,0 +1,66 @@
+import os
+from typing import TYPE_CHECKING, Optional
+import httpx
+
+if TYPE_CHECKING:
+    from elevenlabs.client import ElevenLabs
+    from mistralai import Mistral
+
+# Shared by every Mistral client in the process, closed on application shutdown
+_http_client: Optional[httpx.AsyncClient] = None
+_mistral_client: Optional["Mistral"] = None
+# The ElevenLabs SDK calls are blocking, so text-to-speech gets its own synchronous pool
+_sync_http_client: Optional[httpx.Client] = None
+_elevenlabs_client: Optional["ElevenLabs"] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Process-wide async HTTP client, so every service reuses the same connection pool"""
+    global _http_client
+    if _http_client is None:
+        # HTTP/2 multiplexes concurrent requests over few connections, keep-alive skips repeated TLS handshakes
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+    return _http_client
+
+
+def get_mistral_client() -> "Mistral":
+    """Process-wide Mistral client sending its async requests through the shared HTTP client"""
+    global _mistral_client
+    if _mistral_client is None:
+        # Imported on first use so workers that never call Mistral skip loading the SDK
+        from mistralai import Mistral
+
+        _mistral_client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"), async_client=get_http_client())
+    return _mistral_client
+
+
+def get_elevenlabs_client() -> "ElevenLabs":
+    """Process-wide ElevenLabs client, keeping its connections alive across text-to-speech requests"""
+    global _sync_http_client, _elevenlabs_client
+    if _elevenlabs_client is None:
+        from elevenlabs.client import ElevenLabs
+
+        _sync_http_client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        )
+        _elevenlabs_client = ElevenLabs(api_key=os.getenv("ELEVEN_LABS_API_KEY"), httpx_client=_sync_http_client)
+    return _elevenlabs_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP clients, the next caller gets fresh ones"""
+    global _http_client, _mistral_client, _sync_http_client, _elevenlabs_client
+    if _http_client is not None:
+        await _http_client.aclose()
+    if _sync_http_client is not None:
+        _sync_http_client.close()
+    _http_client = None
+    _mistral_client = None
+    _sync_http_client = None
+    _elevenlabs_client = None
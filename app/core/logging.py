@@ -66,10 +66,17 @@ def get_logger(name: str) -> logging.Logger:
 
 class LoggerMixin:
     """Mixin to add logging capabilities to a class"""
+    _logger: logging.Logger
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # resolved once per class instead of on every log call
+        cls._logger = get_logger(cls.__name__)
+
     @classmethod
     def get_logger(cls) -> logging.Logger:
-        return get_logger(cls.__name__)
+        return cls._logger
     
     @property
     def logger(self) -> logging.Logger:
-        return get_logger(self.__class__.__name__) 
\ No newline at end of file
+        return self._logger 
\ No newline at end of file
@@ -0,0 +1,44 @@
+import logging
+from typing import Tuple, Type
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+# Rate limits and transient server errors, anything else (auth, validation) fails immediately
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether the error carries a retryable HTTP status (Mistral SDK errors or httpx errors)"""
+    status_code = getattr(exc, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(exc, "response", None), "status_code", None)
+    return status_code in RETRYABLE_STATUS_CODES
+
+
+def mistral_retrying(
+    logger: logging.Logger, retry_on: Tuple[Type[BaseException], ...] = ()
+) -> AsyncRetrying:
+    """
+    Retry policy for Mistral calls: up to 4 attempts with jittered exponential backoff.
+    retry_on adds exception types to retry besides retryable HTTP statuses, e.g. parse errors of a JSON reply.
+    """
+
+    def log_retry(retry_state: RetryCallState) -> None:
+        logger.warning(
+            "Retrying Mistral request | attempt: %d | error: %s",
+            retry_state.attempt_number,
+            retry_state.outcome.exception(),
+        )
+
+    return AsyncRetrying(
+        stop=stop_after_attempt(4),
+        wait=wait_random_exponential(min=0.5, max=8),
+        retry=retry_if_exception(lambda exc: isinstance(exc, retry_on) or is_retryable(exc)),
+        before_sleep=log_retry,
+        reraise=True,
+    )
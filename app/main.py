@@ -1,15 +1,18 @@
+from dotenv import load_dotenv
+
+# Load environment variables before the routes import services that read them at import time
+load_dotenv()
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import health, wagons, chat, players, generate
 from app.core.logging import get_logger, setup_logging
-from dotenv import load_dotenv
+from app.core.http import close_http_client
+from app.services.chat_service import ChatService
 from datetime import datetime
 import time
 from pathlib import Path
 
-# Load environment variables
-load_dotenv()
-
 
 # Setup logging
 logger = get_logger("main")
@@ -182,3 +185,11 @@ async def startup_event():
     # Initialize logging
     setup_logging()
 
+    # Index the default game's characters once, before the first chat request needs them
+    ChatService.preload_default_player_details()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Release the pooled connections shared by the Mistral clients
+    await close_http_client()
@@ -1,19 +1,44 @@
 from pydantic import BaseModel, Field
-from typing import Dict, List, Literal
+from pydantic.dataclasses import dataclass
+from dataclasses import field
+from typing import Deque, Dict, Literal, Optional
+from collections import deque
 from datetime import datetime
 import uuid
 
 
-class Message(BaseModel):
+# Upper bound of messages kept per conversation, older messages are dropped first
+MAX_CONVERSATION_MESSAGES = 100
+
+
+# Slotted dataclass: no per-instance __dict__, sessions hold many messages
+@dataclass(slots=True)
+class Message:
     role: Literal["system", "user", "assistant"]
     content: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = field(default_factory=datetime.utcnow)
 
 
 class Conversation(BaseModel):
     uid: str
-    messages: List[Message] = Field(default_factory=list)
+    messages: Deque[Message] = Field(
+        default_factory=lambda: deque(maxlen=MAX_CONVERSATION_MESSAGES)
+    )
     last_interaction: datetime = Field(default_factory=datetime.utcnow)
+    # Internal bookkeeping below, excluded from serialization so API responses only show the history.
+    # Total messages ever appended, unlike len(messages) it keeps growing past the cap
+    message_count: int = Field(default=0, exclude=True)
+    # Summary of the history older than the recent window, message_count when it was last requested,
+    # and how many of the oldest messages (counted like message_count) it already covers
+    summary: Optional[str] = Field(default=None, exclude=True)
+    summarized_at: int = Field(default=0, exclude=True)
+    summarized_count: int = Field(default=0, exclude=True)
+
+    def append(self, message: Message) -> None:
+        """Add a message to the history, dropping the oldest one once the cap is reached"""
+        self.messages.append(message)
+        self.message_count += 1
+        self.last_interaction = message.timestamp
 
 
 class GuessingProgress(BaseModel):
@@ -1,14 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from app.services.session_service import SessionService
 from app.services.chat_service import ChatService
 from app.services.guess_service import GuessingService
 from app.services.scoring_service import ScoringService
 from app.services.tts_service import TTSService
-from app.models.session import Message, UserSession
+from app.utils.ids import parse_wagon_id
+from app.models.session import Conversation, Message, UserSession
 from datetime import datetime
+from functools import lru_cache
 from pydantic import BaseModel
 import base64
 import logging
+import orjson
 
 
 logger = logging.getLogger(__name__)
@@ -35,14 +39,18 @@ class GuessResponse(BaseModel):
     score: float
 
 
+# Services hold no per-request state, so one instance per process is shared across requests
+@lru_cache
 def get_guess_service():
     return GuessingService()
 
 
+@lru_cache
 def get_tts_service():
     return TTSService()
 
 
+@lru_cache
 def get_scoring_service():
     return ScoringService()
 
@@ -80,7 +88,7 @@ async def get_session_status(
 @router.post("/session/{session_id}/advance")
 async def advance_to_next_wagon(session: UserSession = Depends(get_session)) -> dict:
     """Advance to the next wagon"""
-    success = SessionService.advance_wagon(session.session_id)
+    success = await SessionService.advance_wagon_async(session.session_id)
     if not success:
         raise HTTPException(status_code=400, detail="Cannot advance to next wagon")
     return {
@@ -102,7 +110,7 @@ async def guess_password(
     theme = session.current_wagon.theme
     password = session.current_wagon.password
 
-    guess_response = guess_service.generate(
+    guess_response = await guess_service.generate(
         previous_guesses=guessing_progress.guesses,
         theme=theme,
         previous_indications=guessing_progress.indications,
@@ -110,7 +118,7 @@ async def guess_password(
         password=password,
     )
 
-    score = score_service.is_similar(
+    score = await score_service.is_similar(
         password=password, guess=guess_response.guess, theme=password
     )
 
@@ -129,24 +137,11 @@ async def guess_password(
     )
 
 
-@router.post("/session/{session_id}/{uid}", response_model=ChatResponse)
-async def chat_with_character(
-    uid: str,
-    chat_message: ChatMessage,
-    session: UserSession = Depends(get_session),
-    tts_service: TTSService = Depends(get_tts_service),
-) -> dict:
-    """
-    Send a message to a character and get their response.
-    The input is a JSON containing the prompt and related data.
-    """
-
-    # Get the chat service, that loads the character details
-    chat_service = ChatService(session)
-
+def add_user_message(session: UserSession, uid: str, message: str) -> Conversation:
+    """Validate that the character is in the current wagon and record the player's message"""
     # add first checks that the user exists 
     try:
-        wagon_id = int(uid.split("-")[1])
+        wagon_id = parse_wagon_id(uid)
         if wagon_id != session.current_wagon.wagon_id:
             raise HTTPException(
                 status_code=400,
@@ -156,13 +151,32 @@ async def chat_with_character(
         raise HTTPException(status_code=400, detail="Invalid UID format")
 
     # Add user message to conversation
-    user_message = Message(role="user", content=chat_message.message)
+    user_message = Message(role="user", content=message)
     conversation = SessionService.add_message(session.session_id, uid, user_message)
 
     if not conversation:
         raise HTTPException(status_code=500, detail="Failed to process message")
+    return conversation
+
+
+@router.post("/session/{session_id}/{uid}", response_model=ChatResponse)
+async def chat_with_character(
+    uid: str,
+    chat_message: ChatMessage,
+    session: UserSession = Depends(get_session),
+    tts_service: TTSService = Depends(get_tts_service),
+) -> dict:
+    """
+    Send a message to a character and get their response.
+    The input is a JSON containing the prompt and related data.
+    """
 
-    ai_response = chat_service.generate_response(uid, session.current_wagon.theme, conversation)
+    # Get the chat service, that loads the character details
+    chat_service = ChatService(session)
+
+    conversation = add_user_message(session, uid, chat_message.message)
+
+    ai_response = await chat_service.generate_response(uid, session.current_wagon.theme, conversation)
     if not ai_response:
         raise HTTPException(status_code=500, detail="Failed to generate response")
 
@@ -189,6 +203,72 @@ async def chat_with_character(
     }
 
 
+@router.post("/session/{session_id}/{uid}/stream")
+async def stream_chat_with_character(
+    uid: str,
+    chat_message: ChatMessage,
+    session: UserSession = Depends(get_session),
+) -> StreamingResponse:
+    """
+    Send a message to a character and stream the response as server-sent events.
+    Each event carries a JSON object with the next piece of text, the stream ends with [DONE],
+    or with an "error" event if the reply could not be generated.
+    """
+    chat_service = ChatService(session)
+    if uid not in chat_service.character_by_uid:
+        raise HTTPException(status_code=404, detail="Character not found")
+
+    conversation = add_user_message(session, uid, chat_message.message)
+
+    async def event_stream():
+        chunks = []
+        try:
+            async for chunk in chat_service.stream_response(uid, session.current_wagon.theme, conversation):
+                chunks.append(chunk)
+                yield f"data: {orjson.dumps({'uid': uid, 'content': chunk}).decode()}\n\n"
+        except Exception:
+            # Reported as a separate event and not stored, so the history only holds real replies
+            yield f"event: error\ndata: {orjson.dumps({'uid': uid, 'error': 'Failed to generate response'}).decode()}\n\n"
+            return
+
+        # Add AI response to conversation once it is complete
+        ai_response = "".join(chunks)
+        if ai_response:
+            SessionService.add_message(session.session_id, uid, Message(role="assistant", content=ai_response))
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.get("/session/{session_id}/{uid}/speech")
+async def stream_speech(
+    uid: str,
+    session: UserSession = Depends(get_session),
+    tts_service: TTSService = Depends(get_tts_service),
+) -> StreamingResponse:
+    """
+    Stream the character's latest reply as 16-bit PCM audio (22.05 kHz, mono) while it is synthesized,
+    so playback can start at the first chunk instead of after the whole clip.
+    """
+    try:
+        conversation = SessionService.get_conversation(session.session_id, uid)
+    except (IndexError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid UID format")
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found in the current wagon")
+
+    # only text the character actually said is synthesized, never client-provided text
+    reply = next((msg.content for msg in reversed(conversation.messages) if msg.role == "assistant"), None)
+    if reply is None:
+        raise HTTPException(status_code=404, detail="Character has not replied yet")
+
+    # the ElevenLabs iterator is blocking, StreamingResponse iterates it in the threadpool
+    return StreamingResponse(
+        tts_service.stream_text_to_speech(reply),
+        media_type="audio/pcm",
+    )
+
+
 @router.get("/session/{session_id}/{uid}/history", response_model=ChatHistoryResponse)
 async def get_chat_history(
     uid: str, session: UserSession = Depends(get_session)
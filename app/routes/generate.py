@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.services.generate_train.generate_train import GenerateTrainService
+from app.services.chat_service import ChatService
 from app.models.train import GenerateTrainResponse
 from app.utils.file_management import FileManager
 from app.core.logging import get_logger
 from app.services.session_service import SessionService
 import json 
+from functools import lru_cache
 
 
 router = APIRouter(
@@ -14,11 +16,19 @@ router = APIRouter(
 
 logger = get_logger("generate")
 
+
+@lru_cache
+def get_generate_train_service() -> GenerateTrainService:
+    """One shared service per process, it holds no per-request state"""
+    return GenerateTrainService()
+
+
 @router.get("/train/{session_id}/{number_of_wagons}/{theme}")
 async def get_generated_train(
     session_id: str,
     number_of_wagons: str,
-    theme: str
+    theme: str,
+    generate_train_service: GenerateTrainService = Depends(get_generate_train_service),
 ):
     """
     Generate a new train with specified parameters for a session.
@@ -45,11 +55,11 @@ async def get_generated_train(
         raise HTTPException(status_code=400, detail="number_of_wagons cannot exceed 6")
 
     try:
-        generate_train_service = GenerateTrainService()
-        names_data, player_details_data, wagons_data = generate_train_service.generate_train(theme, number_of_wagons)
+        names_data, player_details_data, wagons_data = await generate_train_service.generate_train(theme, number_of_wagons)
         
         # Save the raw data
-        FileManager.save_session_data(session_id, names_data, player_details_data, wagons_data)
+        await FileManager.save_session_data(session_id, names_data, player_details_data, wagons_data)
+        ChatService.clear_player_details_cache()
 
         # Construct response with proper schema
         response = {
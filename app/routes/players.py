@@ -5,6 +5,7 @@ from pathlib import Path
 from app.core.logging import get_logger
 from app.services.session_service import SessionService
 from app.utils.file_management import FileManager
+from app.utils.ids import parse_wagon_id
 
 router = APIRouter(tags=["players"])
 
@@ -49,7 +50,7 @@ async def get_player_info(
         names, player_details, _ = FileManager.load_session_data(session_id, session.default_game)
         # try to convert the wagon_id to an integer if it is not already an integer 
         try:
-            wagon_index = int(wagon_id.split("-")[1])
+            wagon_index = parse_wagon_id(wagon_id)
         except ValueError:
             logger.error(f"Invalid wagon_id: {wagon_id}")
             raise HTTPException(status_code=404, detail="Invalid wagon_id")
@@ -141,12 +142,10 @@ async def get_wagon_players(
 
     # try catch for wagon_index
     try:
-        wagon_index = int(wagon_id.split("-")[1])
+        wagon_index = parse_wagon_id(wagon_id)
     except ValueError:
         logger.error(f"Invalid wagon_id: {wagon_id}")
         raise HTTPException(status_code=404, detail="Invalid wagon_id")
-
-    wagon_index = int(wagon_id.split("-")[1])
     
     try:
         # Load data based on default_game flag
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pathlib import Path
 import json
 from app.services.session_service import SessionService
@@ -17,8 +17,9 @@ async def get_wagons(session_id: str):
     
     try:
         # Use default_game flag from session to determine data source
-        wagons_data = FileManager.load_session_data(session_id, session.default_game)[2]
-        return wagons_data
+        # the file is already JSON, so it is sent as is instead of being parsed and re-serialized
+        raw_wagons = FileManager.load_raw(session_id, "wagons.json", session.default_game)
+        return Response(content=raw_wagons, media_type="application/json")
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -1,151 +1,308 @@
 from app.models.session import Conversation
 from app.core.logging import LoggerMixin
-from pathlib import Path
-import json
-from typing import Optional, Dict
+from app.core.retry import mistral_retrying
+from app.core.http import get_mistral_client
+import asyncio
+import logging
+import hashlib
+import orjson
+from functools import cached_property, lru_cache
+from itertools import islice
+from types import MappingProxyType
+from typing import AsyncIterator, Optional, Dict, List, Mapping, Set, Tuple
 import os
-from mistralai import Mistral
 from app.utils.file_management import FileManager
+from app.utils.cache import LRUCache
 from app.models.session import UserSession
 
 
-# Get the Mistral API key from environment (injected by ECS)
-mistral_api_key = os.getenv("MISTRAL_API_KEY")
+# Read once at import; main loads .env before importing the services
+MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
+
+# Replies keyed by a digest of the full request payload, shared by all ChatService instances
+_response_cache = LRUCache(maxsize=1024)
+
+# Upper bound of Mistral requests in flight at once, shared by all ChatService instances
+_mistral_semaphore = asyncio.Semaphore(int(os.getenv("MISTRAL_MAX_CONCURRENCY", "16")))
+
+# Background summary requests, referenced here so they are not garbage collected mid-flight
+_summary_tasks: Set[asyncio.Task] = set()
 
 
 class ChatService(LoggerMixin):
+    # History sent with each request: at most this many messages and about this many tokens
+    _MAX_HISTORY_MESSAGES = 10
+    _MAX_HISTORY_TOKENS = 2000
+    # Once a conversation is longer than the threshold, the messages before the recent window are
+    # summarized by a cheaper model, refreshed every interval new messages
+    _SUMMARY_MODEL = "mistral-small-latest"
+    _SUMMARY_THRESHOLD = 20
+    _SUMMARY_INTERVAL = 10
+
+    # Character system prompt, rendered with the theme and the character's profile fields
+    _PROMPT_TMPL = """
+        You are an NPC in a fictional world set in the theme of {theme}. You are part of this theme's story and lore.
+        Your name is {name}, and you are a {profession}.
+        Your role in the story is {role}, and you have a mysterious secret tied to you: {mystery_intrigue}. Your personality is {personality}, 
+        which influences how you speak, act, and interact with others. Stay in character at all times, 
+        and respond to the player based on your occupation, role, mystery, and personality.
+
+        You may only reveal your mystery if the player explicitly asks about it or asks about something closely related to it. 
+        For example, if your mystery involves a hidden treasure, and the player asks about rumors of gold in the area, you may
+        hint at or reveal your secret. However, you should still respond in a way that feels natural to your character.
+        Do not break character or reveal your mystery too easily—only share it if it makes sense in the context of the conversation 
+        and your personality.
+
+        Respond in maximum 3-4 sentences per message to keep the conversation flowing and engaing for the player.
+        """
+
     def __init__(self, session: UserSession):
         self.logger.info("Initializing ChatService")
-        # Load all available character in every wagon. 
-        self.player_details: Dict = self._load_player_details(session)
-
-        if len(self.player_details) == 0:
-            self.logger.error("Failed to initialize player details - array is empty")
-        else:
-            self.logger.info(f"Loaded player details for wagons: {list(self.player_details)}")
+        # Player details are loaded on first use, so sessions that never chat skip the disk read
+        self.session = session
 
-        # Get the Mistral API key from environment (injected by ECS)
-        mistral_api_key = os.getenv("MISTRAL_API_KEY")
-        if not mistral_api_key:
+        if not MISTRAL_API_KEY:
             self.logger.error("MISTRAL_API_KEY not found in environment variables")
             raise ValueError("MISTRAL_API_KEY is required")
 
-        self.client = Mistral(api_key=mistral_api_key)
+        self.client = get_mistral_client()
         self.model = "mistral-large-latest"
 
         self.logger.info("Initialized Mistral AI client")
 
+    @cached_property
+    def _player_details(self) -> Tuple[Mapping[str, Dict], Dict[Tuple[str, str], Dict[str, str]]]:
+        """Characters and their system messages, loaded on first access"""
+        character_by_uid, system_messages = self._load_player_details(self.session)
+
+        if len(character_by_uid) == 0:
+            self.logger.error("Failed to initialize player details - no characters found")
+        else:
+            self.logger.info("Loaded player details | character_count: %d", len(character_by_uid))
+        return character_by_uid, system_messages
+
+    @property
+    def character_by_uid(self) -> Mapping[str, Dict]:
+        """All available characters in every wagon, keyed by their uid wagon-<i>-player-<k>"""
+        return self._player_details[0]
+
+    @property
+    def system_messages(self) -> Dict[Tuple[str, str], Dict[str, str]]:
+        """System messages rendered once per (uid, theme) and shared with the cache"""
+        return self._player_details[1]
+
     @classmethod
-    def _load_player_details(cls, session) -> Dict:
+    def _load_player_details(cls, session) -> Tuple[Mapping[str, Dict], Dict[Tuple[str, str], Dict[str, str]]]:
         """Load character details from JSON files"""
         try:
-            # Use FileManager to load the default session data
-            _, player_details, _ = FileManager.load_session_data(session.session_id, session.default_game)
+            # All default games share the same data, so they share one cache entry
+            source_id = "default" if session.default_game else session.session_id
+            character_by_uid, system_messages = cls._read_player_details(source_id, session.default_game)
             
-            if len(player_details) == 0:
+            if len(character_by_uid) == 0:
                 cls.get_logger().error("Missing 'player_details' key in JSON data")
-                return {}
+                return {}, {}
             
             # success for loading player_details
-            cls.get_logger().info(f"Successfully loaded player details.: {list(player_details)}")
-            return player_details
+            cls.get_logger().info("Successfully loaded player details | character_count: %d", len(character_by_uid))
+            return character_by_uid, system_messages
         
         except FileNotFoundError as e:
-            cls.get_logger().error(f"Failed to load default player details: {str(e)}")
-            return {}
+            cls.get_logger().error("Failed to load default player details: %s", e)
+            return {}, {}
         except Exception as e:
-            cls.get_logger().error(f"Failed to load player details: {str(e)}")
-            return {}
+            cls.get_logger().error("Failed to load player details: %s", e)
+            return {}, {}
 
-    def _get_character_context(self, uid: str) -> Optional[Dict]:
-        """Get the character's context for the conversation"""
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _read_player_details(source_id: str, default_game: bool) -> Tuple[Mapping[str, Dict], Dict[Tuple[str, str], Dict[str, str]]]:
+        """
+        Parse player_details.json once per data source, index every character by its uid
+        and render each character's system message for the theme of its wagon.
+        """
+        _, player_details, wagons = FileManager.load_session_data(source_id, default_game)
+        themes = {f"wagon-{wagon['id']}": wagon["theme"] for wagon in wagons}
+
+        character_by_uid = {}
+        system_messages = {}
+        for wagon in player_details:
+            theme = themes.get(wagon["wagonId"])
+            for player in wagon["players"]:
+                uid = f"{wagon['wagonId']}-{player['playerId']}"
+                character_by_uid[uid] = player
+                if theme is not None:
+                    system_messages[(uid, theme)] = {
+                        "role": "system",
+                        "content": ChatService._create_character_prompt(theme, player),
+                    }
+        # The index is shared by every session of this data source, so hand out a read-only view
+        return MappingProxyType(character_by_uid), system_messages
+
+    @classmethod
+    def preload_default_player_details(cls) -> None:
+        """Parse the default game's player details ahead of the first chat request"""
         try:
-            self.logger.debug(f"Getting character context for uid: {uid}")
-            # "wagon-<i>-player-<k>"
-            uid_splitted = uid.split("-")
-            # try catch for wagon_index 
-            try:
-                wagon_index = int(uid_splitted[1])
-            except ValueError:
-                self.logger.error(f"Invalid wagon index | uid: {uid} | wagon_index: {uid_splitted[1]}")
-                return None
-            
-            wagon_key, player_key = (
-                f"wagon-{wagon_index}",
-                f"player-{uid_splitted[3]}",
-            )
+            character_by_uid, _ = cls._read_player_details("default", True)
+            cls.get_logger().info("Preloaded default player details | character_count: %d", len(character_by_uid))
+        except Exception as e:
+            cls.get_logger().error("Failed to preload default player details: %s", e)
 
-            # check if the wagon key exists
-            if len(self.player_details) == 0:
-                self.logger.error("Wagon not found in player details")
-                return None
+    @classmethod
+    def clear_player_details_cache(cls) -> None:
+        """Drop cached player details, e.g. after a new train was generated"""
+        cls._read_player_details.cache_clear()
 
-            # find specific player details
-            specific_player_detais = next((player for player in self.player_details[wagon_index]["players"] if player["playerId"] == player_key), None)
+    def _get_character_context(self, uid: str) -> Optional[Dict]:
+        """Get the character's context for the conversation"""
+        self.logger.debug("Getting character context for uid: %s", uid)
+        character = self.character_by_uid.get(uid)
 
-            self.logger.debug(
-                f"Retrieved player context | uid: {uid} | wagon: {wagon_key} | player: {player_key} | profession: {specific_player_detais['profile']['profession']}"
+        if character is None:
+            self.logger.error(
+                "Failed to get character context - unknown uid | uid: %s | character_count: %d",
+                uid,
+                len(self.character_by_uid),
             )
-            return specific_player_detais
-        except (KeyError, IndexError) as e:
-            self.logger.error(f"Failed to get character context: {str(e)} | uid: {uid} | error: {str(e)} | player_details_keys: {list(self.player_details) if self.player_details else None}")
             return None
 
-    def _create_character_prompt(self, theme: str, character: Dict) -> str:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "Retrieved player context | uid: %s | profession: %s", uid, character["profile"]["profession"]
+            )
+        return character
+
+    @classmethod
+    def _create_character_prompt(cls, theme: str, character: Dict) -> str:
         """Create a prompt that describes the character's personality and context"""
-        occupation = character["profile"]["profession"]
-        personality = character["profile"]["personality"]
-        role = character["profile"]["role"]
-        mystery = character["profile"]["mystery_intrigue"]
-        name = character["profile"]["name"]
+        return cls._PROMPT_TMPL.format(theme=theme, **character["profile"])
 
-        prompt = f"""
-        You are an NPC in a fictional world set in the theme of {theme}. You are part of this theme's story and lore.
-        Your name is {name}, and you are a {occupation}.
-        Your role in the story is {role}, and you have a mysterious secret tied to you: {mystery}. Your personality is {personality}, 
-        which influences how you speak, act, and interact with others. Stay in character at all times, 
-        and respond to the player based on your occupation, role, mystery, and personality.
+    def _build_messages(self, uid: str, theme: str, character: Dict, conversation: Conversation) -> List[Dict[str, str]]:
+        """Build the Mistral AI payload: the character's system message followed by recent history"""
+        # Reuse the prerendered system message, rendering it only for an unseen theme.
+        # The SDK only reads the payload, so the same dict is safely shared between requests.
+        system_message = self.system_messages.get((uid, theme))
+        if system_message is None:
+            system_message = {"role": "system", "content": self._create_character_prompt(theme, character)}
+            self.system_messages[(uid, theme)] = system_message
 
-        You may only reveal your mystery if the player explicitly asks about it or asks about something closely related to it. 
-        For example, if your mystery involves a hidden treasure, and the player asks about rumors of gold in the area, you may
-        hint at or reveal your secret. However, you should still respond in a way that feels natural to your character.
-        Do not break character or reveal your mystery too easily—only share it if it makes sense in the context of the conversation 
-        and your personality.
+        # Message roles already use Mistral's vocabulary, so history is copied over as is
+        window = self._history_window(conversation)
+        history = [
+            {"role": msg.role, "content": msg.content}
+            for msg in islice(conversation.messages, len(conversation.messages) - window, None)
+        ]
 
-        Respond in maximum 3-4 sentences per message to keep the conversation flowing and engaing for the player.
-        """
+        if conversation.summary:
+            return [system_message, {"role": "system", "content": f"Prior summary: {conversation.summary}"}] + history
+        return [system_message] + history
+
+    def _history_window(self, conversation: Conversation) -> int:
+        """Number of recent messages sent as history: walk back from the newest message until the
+        message limit or the token budget is used up (the newest is always kept)"""
+        count = 0
+        token_budget = self._MAX_HISTORY_TOKENS
+        for msg in islice(reversed(conversation.messages), self._MAX_HISTORY_MESSAGES):
+            token_budget -= self._estimate_tokens(msg.content)
+            if token_budget < 0 and count:
+                break
+            count += 1
+        return count
+
+    def _schedule_summary(self, uid: str, conversation: Conversation) -> None:
+        """Refresh the conversation summary in the background once enough new messages came in"""
+        if len(conversation.messages) <= self._SUMMARY_THRESHOLD:
+            return
+        if conversation.message_count - conversation.summarized_at < self._SUMMARY_INTERVAL:
+            return
+
+        # Mark before the request completes, so turns arriving while it is in flight (or after it
+        # failed) wait for the next interval instead of scheduling another request
+        conversation.summarized_at = conversation.message_count
+        task = asyncio.create_task(self._summarize(uid, conversation))
+        _summary_tasks.add(task)
+        task.add_done_callback(_summary_tasks.discard)
+
+    async def _summarize(self, uid: str, conversation: Conversation) -> None:
+        """Fold the messages that left the recent history window into the running summary"""
+        messages = list(conversation.messages)
+        # message_count of the first message still held, older ones were dropped by the history cap
+        offset = conversation.message_count - len(messages)
+        start = max(conversation.summarized_count - offset, 0)
+        # Cover everything up to the start of the history window _build_messages sends
+        end = len(messages) - self._history_window(conversation)
+        if end <= start:
+            return
+
+        previous_summary = conversation.summary
+        transcript = "\n".join(f"{msg.role}: {msg.content}" for msg in messages[start:end])
+        if previous_summary:
+            transcript = f"Summary so far: {previous_summary}\n\nNew messages:\n{transcript}"
+        try:
+            async for attempt in mistral_retrying(self.logger):
+                with attempt:
+                    async with _mistral_semaphore:
+                        summary_response = await self.client.chat.complete_async(
+                            model=self._SUMMARY_MODEL,
+                            messages=[
+                                {
+                                    "role": "system",
+                                    "content": "Summarize this conversation between a player and a character in a few sentences, "
+                                    "extending the summary so far (if any) with the new messages. "
+                                    "Keep the player's goals and any facts the character revealed.",
+                                },
+                                {"role": "user", "content": transcript},
+                            ],
+                            temperature=0.3,
+                            max_tokens=150,
+                        )
+            summary = summary_response.choices[0].message.content
+            # Skip the result if another refresh already covered these messages meanwhile
+            if summary and isinstance(summary, str) and offset + end > conversation.summarized_count:
+                conversation.summary = summary
+                conversation.summarized_count = offset + end
+                self.logger.info("Updated conversation summary | uid: %s | summarized_messages: %d", uid, end - start)
+        except Exception as e:
+            self.logger.warning("Failed to summarize conversation | uid: %s | error: %s", uid, e)
 
-        return prompt
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Rough token count, Mistral's tokenizer averages about four characters per token"""
+        return len(text) // 4 + 1
 
-    def generate_response(self, uid: str, theme: str, conversation: Conversation) -> Optional[str]:
+    def _cache_key(self, messages: List[Dict[str, str]]) -> bytes:
+        """Digest of the full request payload, identical payloads share a cached reply"""
+        return hashlib.blake2b(orjson.dumps([self.model, messages]), digest_size=16).digest()
+
+    async def generate_response(self, uid: str, theme: str, conversation: Conversation) -> Optional[str]:
         """Generate a response using Mistral AI based on character profile"""
-        self.logger.info(f"Generating response for uid: {uid}")
+        self.logger.info("Generating response for uid: %s", uid)
         character = self._get_character_context(uid)
 
         if not character:
-            self.logger.error(
-                f"Cannot generate response - character not found for uid: {uid}"
-            )
+            self.logger.error("Cannot generate response - character not found for uid: %s", uid)
             return None
 
         try:
-            # Create the system prompt with character context
-            system_prompt = self._create_character_prompt(theme, character)
+            messages = self._build_messages(uid, theme, character, conversation)
+            self._schedule_summary(uid, conversation)
 
-            # Convert conversation history to Mistral AI format
-            messages = [{"role": "system", "content": system_prompt}]
-
-            # Add conversation history (limit to last 10 messages to stay within context window)
-            for msg in conversation.messages[-10:]:
-                # Convert 'agent' role to 'assistant' for Mistral compatibility
-                role = "assistant" if msg.role == "agent" else msg.role
-                messages.append({"role": role, "content": msg.content})
+            # Identical payloads (e.g. the first greeting to the same character) reuse the last reply
+            cache_key = self._cache_key(messages)
+            cached_response = _response_cache.get(cache_key)
+            if cached_response is not None:
+                self.logger.info("Serving cached Mistral AI response | uid: %s", uid)
+                return cached_response
 
             # Get response from Mistral AI
             try:
-                chat_response = self.client.chat.complete(
-                    model=self.model, messages=messages, temperature=0.7, max_tokens=500
-                )
+                # Rate limits and 5xx errors are retried with backoff, the slot is released while waiting
+                async for attempt in mistral_retrying(self.logger):
+                    with attempt:
+                        async with _mistral_semaphore:
+                            chat_response = await self.client.chat.complete_async(
+                                model=self.model, messages=messages, temperature=0.7, max_tokens=500
+                            )
 
                 if not chat_response or not chat_response.choices:
                     raise ValueError("Empty response received from Mistral AI")
@@ -156,19 +313,103 @@ class ChatService(LoggerMixin):
                     raise ValueError(f"Invalid response format: {type(response)}")
 
                 self.logger.info(
-                    f"Generated Mistral AI response | uid: {uid} | response_length: {len(response)} | conversation_length: {len(conversation.messages)}"
+                    "Generated Mistral AI response | uid: %s | response_length: %d | conversation_length: %d",
+                    uid,
+                    len(response),
+                    len(conversation.messages),
                 )
 
+                _response_cache.set(cache_key, response)
                 return response
 
             except Exception as api_error:
                 self.logger.error(
-                    f"Mistral API error | uid: {uid} | error: {str(api_error)} | messages_count: {len(messages)}"
+                    "Mistral API error | uid: %s | error: %s | messages_count: %d", uid, api_error, len(messages)
                 )
                 raise ValueError(f"Mistral API error: {str(api_error)}")
 
         except Exception as e:
             self.logger.error(
-                f"Failed to generate Mistral AI response | uid: {uid} | error: {str(e)} | error_type: {type(e).__name__} | character_name: {character.get('profile', {}).get('name', 'unknown')}"
+                "Failed to generate Mistral AI response | uid: %s | error: %s | error_type: %s | character_name: %s",
+                uid,
+                e,
+                type(e).__name__,
+                character.get("profile", {}).get("name", "unknown"),
             )
             return f"I apologize, but I'm having trouble responding right now. Error: {str(e)}"
+
+    async def _pump_stream(self, messages: List[Dict[str, str]], queue: "asyncio.Queue[Optional[str]]") -> None:
+        """Put the streamed pieces on the queue, then None; a Mistral slot is held only while upstream produces"""
+        try:
+            # Only opening the stream is retried, once chunks were sent the reply cannot be restarted
+            async for attempt in mistral_retrying(self.logger):
+                with attempt:
+                    # The slot is taken per attempt, so backoff sleeps between attempts do not hold it
+                    await _mistral_semaphore.acquire()
+                    try:
+                        stream = await self.client.chat.stream_async(
+                            model=self.model, messages=messages, temperature=0.7, max_tokens=500
+                        )
+                    except BaseException:
+                        _mistral_semaphore.release()
+                        raise
+            try:
+                async for event in stream:
+                    content = event.data.choices[0].delta.content
+                    if content and isinstance(content, str):
+                        queue.put_nowait(content)
+            finally:
+                _mistral_semaphore.release()
+        finally:
+            queue.put_nowait(None)
+
+    async def stream_response(self, uid: str, theme: str, conversation: Conversation) -> AsyncIterator[str]:
+        """Stream the character's response piece by piece while Mistral AI generates it"""
+        self.logger.info("Streaming response for uid: %s", uid)
+        character = self._get_character_context(uid)
+
+        if not character:
+            self.logger.error("Cannot stream response - character not found for uid: %s", uid)
+            return
+
+        messages = self._build_messages(uid, theme, character, conversation)
+        self._schedule_summary(uid, conversation)
+
+        cache_key = self._cache_key(messages)
+        cached_response = _response_cache.get(cache_key)
+        if cached_response is not None:
+            self.logger.info("Serving cached Mistral AI response | uid: %s", uid)
+            yield cached_response
+            return
+
+        chunks = []
+        queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        # Upstream is drained by its own task, so a slow client never holds a Mistral slot
+        producer = asyncio.create_task(self._pump_stream(messages, queue))
+        try:
+            while (content := await queue.get()) is not None:
+                chunks.append(content)
+                yield content
+            await producer
+        except Exception as e:
+            self.logger.error(
+                "Failed to stream Mistral AI response | uid: %s | error: %s | error_type: %s | streamed_chunks: %d",
+                uid,
+                e,
+                type(e).__name__,
+                len(chunks),
+            )
+            # Callers signal the failure to the client, the partial reply must not be stored
+            raise
+        finally:
+            producer.cancel()
+
+        response = "".join(chunks)
+        self.logger.info(
+            "Streamed Mistral AI response | uid: %s | response_length: %d | conversation_length: %d",
+            uid,
+            len(response),
+            len(conversation.messages),
+        )
+        if response:
+            _response_cache.set(cache_key, response)
@@ -66,19 +66,52 @@ def convert_wagon_to_three_jsons(wagon_data: Dict) -> Tuple[Dict, Dict, Dict]:
     passcode = wagon_data.get("passcode", "no-passcode")
     passengers = wagon_data.get("passengers", [])
 
-    logger.debug(f"Processing wagon conversion | wagon_id={wagon_id} | theme={theme} | num_passengers={len(passengers)}")
+    logger.debug("Processing wagon conversion | wagon_id=%s | theme=%s | num_passengers=%d", wagon_id, theme, len(passengers))
 
     try:
+        # Per-passenger fields shared by the three outputs, computed once
+        player_keys = [f"player-{i}" for i in range(1, len(passengers) + 1)]
+        names = [passenger.get("name", "") for passenger in passengers]
+        name_parts = [name.split() for name in names]
+        model_types = [passenger.get("characer_model", "character-male-a") for passenger in passengers]
+
+        # Draw every passenger's placement (x, y, rotation) for this wagon in one pass
+        draws = iter([round(random.random(), 2) for _ in range(3 * len(passengers))])
+        placements = list(zip(draws, draws, draws))
+
         # 1) Build the "names" object for this wagon
         names_entry = {
             "wagonId": f"wagon-{wagon_id}",
-            "players": []
+            "players": [
+                {
+                    "playerId": player_key,
+                    "firstName": parts[0] if parts else "",
+                    "lastName": " ".join(parts[1:]),
+                    # Determine sex based on character model
+                    "sex": "female" if "female" in model_type else "male",
+                    "fullName": name
+                }
+                for player_key, name, parts, model_type in zip(player_keys, names, name_parts, model_types)
+            ]
         }
 
         # 2) Build the "player_details" object for this wagon
         player_details_entry = {
             "wagonId": f"wagon-{wagon_id}",
-            "players": []
+            "players": [
+                {
+                    "playerId": player_key,
+                    "profile": {
+                        "name": name,
+                        "age": passenger.get("age", 0),
+                        "profession": passenger.get("profession", ""),
+                        "personality": passenger.get("personality", ""),
+                        "role": passenger.get("role", ""),
+                        "mystery_intrigue": passenger.get("mystery_intrigue", "")
+                    }
+                }
+                for player_key, name, passenger in zip(player_keys, names, passengers)
+            ]
         }
 
         # 3) Build the "wagon" object
@@ -86,83 +119,54 @@ def convert_wagon_to_three_jsons(wagon_data: Dict) -> Tuple[Dict, Dict, Dict]:
             "id": wagon_id,
             "theme": theme,
             "passcode": passcode,
-            "people": []
+            "people": [
+                {
+                    "uid": f"wagon-{wagon_id}-{player_key}",
+                    "position": [x, y],
+                    "rotation": rotation,
+                    "model_type": model_type,
+                    "items": []
+                }
+                for player_key, model_type, (x, y, rotation) in zip(player_keys, model_types, placements)
+            ]
         }
 
-        # Process each passenger
-        for i, passenger in enumerate(passengers, 1):
-            logger.debug(f"Converting passenger data | wagon_id={wagon_id} | passenger_index={i} | passenger_name={passenger.get('name', 'Unknown')}")
-            
-            player_key = f"player-{i}"
-            name = passenger.get("name", "")
-            
-            # Split name into components
-            name_parts = name.split()
-            first_name = name_parts[0] if name_parts else ""
-            last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
-            
-            # Determine sex based on character model
-            model_type = passenger.get("characer_model", "character-male-a")
-            sex = "female" if "female" in model_type else "male"
-
-            # Add to names structure
-            names_entry["players"].append({
-                "playerId": player_key,
-                "firstName": first_name,
-                "lastName": last_name,
-                "sex": sex,
-                "fullName": name
-            })
-
-            # Add to player_details structure
-            profile = {
-                "name": name,
-                "age": passenger.get("age", 0),
-                "profession": passenger.get("profession", ""),
-                "personality": passenger.get("personality", ""),
-                "role": passenger.get("role", ""),
-                "mystery_intrigue": passenger.get("mystery_intrigue", "")
-            }
-            player_details_entry["players"].append({"playerId": player_key, "profile": profile})
-
-            # Add to wagon people structure
-            person_dict = {
-                "uid": f"wagon-{wagon_id}-player-{i}",
-                "position": [round(random.random(), 2), round(random.random(), 2)],
-                "rotation": round(random.random(), 2),
-                "model_type": model_type,
-                "items": []
-            }
-            wagon_entry["people"].append(person_dict)
-
-        logger.debug(f"Completed wagon conversion | wagon_id={wagon_id} | players_processed={len(passengers)}")
+        logger.debug("Completed wagon conversion | wagon_id=%s | players_processed=%d", wagon_id, len(passengers))
         return names_entry, player_details_entry, wagon_entry
 
     except Exception as e:
-        logger.error(f"Error converting wagon | wagon_id={wagon_id} | error_type={type(e).__name__} | error_msg={str(e)}")
+        logger.error("Error converting wagon | wagon_id=%s | error_type=%s | error_msg=%s", wagon_id, type(e).__name__, e)
         raise
 
 def convert_and_return_jsons(wagons_data: List[Dict]) -> Tuple[Dict, Dict, Dict]:
     """Convert raw wagon data into the three required JSON structures"""
-    logger.info(f"Starting conversion of wagon data | total_wagons={len(wagons_data)}")
+    logger.info("Starting conversion of wagon data | total_wagons=%d", len(wagons_data))
     
-    all_names = []
-    all_player_details = []
-    all_wagons = []
+    # One slot per wagon, filled by index
+    total_wagons = len(wagons_data)
+    all_names = [None] * total_wagons
+    all_player_details = [None] * total_wagons
+    all_wagons = [None] * total_wagons
 
     try:
-        for wagon in wagons_data:
-            logger.debug(f"Converting wagon | wagon_id={wagon['id']} | theme={wagon['theme']} | num_passengers={len(wagon.get('passengers', []))}")
-            
-            names, player_details, wagon_entry = convert_wagon_to_three_jsons(wagon)
+        for i, wagon in enumerate(wagons_data):
+            logger.debug(
+                "Converting wagon | wagon_id=%s | theme=%s | num_passengers=%d",
+                wagon["id"],
+                wagon["theme"],
+                len(wagon.get("passengers", [])),
+            )
             
-            all_names.append(names)
-            all_player_details.append(player_details)
-            all_wagons.append(wagon_entry)
-
-        logger.info(f"Successfully converted all wagons | total_names={len(all_names)} | total_player_details={len(all_player_details)} | total_wagons={len(all_wagons)}")
+            all_names[i], all_player_details[i], all_wagons[i] = convert_wagon_to_three_jsons(wagon)
+
+        logger.info(
+            "Successfully converted all wagons | total_names=%d | total_player_details=%d | total_wagons=%d",
+            len(all_names),
+            len(all_player_details),
+            len(all_wagons),
+        )
         return all_names, all_player_details, all_wagons
 
     except Exception as e:
-        logger.error(f"Error converting wagon data | error_type={type(e).__name__} | error_msg={str(e)}")
+        logger.error("Error converting wagon data | error_type=%s | error_msg=%s", type(e).__name__, e)
         raise
\ No newline at end of file
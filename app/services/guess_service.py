@@ -1,12 +1,12 @@
 import os
-from langchain_mistralai import ChatMistralAI
-from langchain_core.prompts import PromptTemplate
 from pydantic import BaseModel, Field
 from app.models.session import Message
 from app.core.logging import LoggerMixin
 from app.prompts import GUESSING_PROMPT
 
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
+# Guessing is on the latency-critical path, a small model answers fastest
+GUESS_MODEL = os.getenv("MISTRAL_GUESS_MODEL", "ministral-8b-latest")
 
 
 class GuessResponse(BaseModel):
@@ -17,13 +17,23 @@ class GuessResponse(BaseModel):
 
 
 class GuessingService(LoggerMixin):
-    def __init__(self: "GuessingService") -> None:
+    def __init__(
+        self: "GuessingService",
+        model_name: str = GUESS_MODEL,
+        enable_password_filter: bool = True,
+    ) -> None:
         self.logger.info("Initializing GuessingService")
+        self.model_name = model_name
+        self.enable_password_filter = enable_password_filter
+        # LangChain has a heavy import graph, load it only once a guessing service is needed
+        from langchain_mistralai import ChatMistralAI
+        from langchain_core.prompts import PromptTemplate
+
         prompt = PromptTemplate.from_template(GUESSING_PROMPT)
 
         llm = (
             ChatMistralAI(
-                model_name="mistral-large-latest",
+                model_name=self.model_name,
                 temperature=1,
             )
             .with_structured_output(schema=GuessResponse)
@@ -31,14 +41,22 @@ class GuessingService(LoggerMixin):
         )
 
         self.chain = prompt | llm
-        self.logger.info("GuessingService initialized with Mistral LLM")
+        self.logger.info("GuessingService initialized with Mistral LLM | model=%s", self.model_name)
+
+    @staticmethod
+    def _compress(msg: str, max_chars: int = 400) -> str:
+        """Shorten a long indication to its opening and closing parts"""
+        if len(msg) <= max_chars:
+            return msg
+        half = (max_chars - 5) // 2
+        return f"{msg[:half]} ... {msg[-half:]}"
 
     def filter_password(self: "GuessingService", indication: str, password: str) -> str:
         filtered = indication.replace(password, "*******")
         self.logger.debug(f"Filtered password from indication | original_length={len(indication)} | filtered_length={len(filtered)}")
         return filtered
 
-    def generate(
+    async def generate(
         self: "GuessingService",
         previous_guesses: list[str],
         theme: str,
@@ -48,17 +66,19 @@ class GuessingService(LoggerMixin):
     ) -> GuessResponse:
         self.logger.info(f"Generating guess | theme={theme} | num_previous_guesses={len(previous_guesses)} | num_previous_indications={len(previous_indications)}")
         
-        previous_indications = [message.content for message in previous_indications]
+        # Only the five most recent indications reach the prompt, long ones are shortened to bound input tokens
+        previous_indications = [self._compress(message.content) for message in previous_indications[-5:]]
         self.logger.debug(f"Processing previous indications | count={len(previous_indications)}")
 
-        current_indication = self.filter_password(current_indication, password)
+        if self.enable_password_filter:
+            current_indication = self.filter_password(current_indication, password)
         
         try:
-            response = self.chain.invoke(
+            response = await self.chain.ainvoke(
                 {
-                    "previous_guesses": previous_guesses[:3],
+                    "previous_guesses": previous_guesses[-3:],
                     "theme": theme,
-                    "previous_indications": previous_indications[:5],
+                    "previous_indications": previous_indications,
                     "current_indication": current_indication,
                 }
             )
@@ -1,36 +1,57 @@
-from mistralai import Mistral
-import os
 import orjson
-import time
+from app.core.http import get_mistral_client
+from app.core.logging import LoggerMixin
+from app.core.retry import mistral_retrying
+from app.utils.cache import LRUCache
 
-MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
+# Scores keyed by the normalized (password, guess, theme), players often repeat the same guesses
+_score_cache = LRUCache(maxsize=4096)
 
 
-class ScoringService:
+class ScoringService(LoggerMixin):
     def __init__(self: "ScoringService"):
-        self.client = Mistral(api_key=MISTRAL_API_KEY)
+        self.client = get_mistral_client()
         self.model = "mistral-small-2409"
-        self.max_retries = 3
 
-    def is_similar(
+    async def is_similar(
         self: "ScoringService", password: str, guess: str, theme: str
     ) -> bool:
+        return (await self.is_similar_batch([(password, guess, theme)]))[0]
+
+    async def is_similar_batch(
+        self: "ScoringService", pairs: list[tuple[str, str, str]]
+    ) -> list[float]:
+        """Score several (password, guess, theme) triples, uncached ones share a single Mistral call"""
+        cache_keys = [(password.strip().lower(), guess.strip().lower(), theme) for password, guess, theme in pairs]
+        # An exact match (ignoring case and surrounding spaces) is a perfect score without asking Mistral
+        scores = [
+            1.0 if password_key == guess_key else _score_cache.get((password_key, guess_key, theme))
+            for password_key, guess_key, theme in cache_keys
+        ]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if not missing:
+            return scores
+
         messages = [
             {
                 "role": "system",
                 "content": """
-                Return a similarity score between the two given words, relatively to a theme. Return the score in the range [0, 1] in a JSON format with the key 'score'
+                For each numbered pair, return a similarity score between the two given words, relatively to its theme. Return the scores in the range [0, 1] in a JSON format with the key 'scores', a list with one score per pair in the given order
                 """,
             },
             {
                 "role": "user",
-                "content": f"Answer: {password}\nGuess: {guess}\nTheme: {theme}",
+                "content": "\n".join(
+                    f"{n}. Answer: {pairs[i][0]}\nGuess: {pairs[i][1]}\nTheme: {pairs[i][2]}"
+                    for n, i in enumerate(missing, 1)
+                ),
             },
         ]
 
-        for attempt in range(self.max_retries):
-            try:
-                response = self.client.chat.complete(
+        # Malformed JSON and a wrong number of scores are retried on top of rate limits / 5xx errors
+        async for attempt in mistral_retrying(self.logger, retry_on=(ValueError, KeyError)):
+            with attempt:
+                response = await self.client.chat.complete_async(
                     model=self.model,
                     messages=messages,
                     temperature=0.0,
@@ -40,12 +61,11 @@ class ScoringService:
                 )
 
                 # Parse the response with orjson
-                parsed_response = orjson.loads(response.choices[0].message.content)
-                return parsed_response["score"]
-            except orjson.JSONDecodeError as e:
-                if attempt < self.max_retries - 1:
-                    time.sleep(1)
-                else:
-                    raise e
-
-        return 0.5
+                new_scores = orjson.loads(response.choices[0].message.content)["scores"]
+                if len(new_scores) != len(missing):
+                    raise ValueError(f"Expected {len(missing)} scores, got {len(new_scores)}")
+
+        for i, score in zip(missing, new_scores):
+            scores[i] = score
+            _score_cache.set(cache_keys[i], score)
+        return scores
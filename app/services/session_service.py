@@ -1,56 +1,76 @@
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Any, Optional
 from app.models.session import (
     UserSession,
-    WagonProgress,
     Conversation,
     Message,
     GuessingProgress,
 )
 from app.core.logging import LoggerMixin
+import asyncio
+import logging
+import os
+import threading
 import uuid
 from app.utils.file_management import FileManager
+from app.utils.ids import parse_wagon_id
 
 
 # used as dependency injection for the session service
 class SessionService(LoggerMixin):
-    # dictionary to store all the sessions
-    _sessions: Dict[str, UserSession] = {}
+    # all sessions, least recently used first; bounded so abandoned sessions cannot grow memory forever
+    _sessions: "OrderedDict[str, UserSession]" = OrderedDict()
+    MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "10000"))
+    # guards every access that mutates _sessions, including the recency bump in get_session
+    _lock = threading.Lock()
 
     @classmethod
     def create_session(cls) -> UserSession:
         """Create a new session"""
         session_id = str(uuid.uuid4())
+        now = datetime.utcnow()
         
         session = UserSession(
             session_id=session_id,
-            created_at=datetime.utcnow(),
-            last_active=datetime.utcnow(),
+            created_at=now,
+            last_active=now,
             default_game=True
         )
         
-        cls._sessions[session_id] = session
-        cls.get_logger().info(f"Created new session: {session_id}")
+        with cls._lock:
+            cls._sessions[session_id] = session
+            while len(cls._sessions) > cls.MAX_SESSIONS:
+                evicted_id, _ = cls._sessions.popitem(last=False)
+                cls._logger.info("Evicted least recently used session: %s", evicted_id)
+        cls._logger.info("Created new session: %s", session_id)
         return session
 
     @classmethod
     def get_session(cls, session_id: str) -> Optional[UserSession]:
         """Get session by ID"""
-        session = cls._sessions.get(session_id)
-        if session:
+        # the recency bump mutates the store, so the lookup and the move happen under the lock
+        with cls._lock:
+            session = cls._sessions.get(session_id)
+            if session is not None:
+                cls._sessions.move_to_end(session_id)
+        if session is not None:
             session.last_active = datetime.utcnow()
-            cls.get_logger().debug(f"Retrieved session: {session_id}")
+            # hot read path, skip the logging call entirely when debug is filtered out
+            if cls._logger.isEnabledFor(logging.DEBUG):
+                cls._logger.debug("Retrieved session: %s", session_id)
         else:
-            cls.get_logger().warning(f"Session not found: {session_id}")
+            cls._logger.warning("Session not found: %s", session_id)
         return session
 
     @classmethod
     def update_session(cls, session: UserSession) -> None:
         """Update a session's last active timestamp"""
+        # sessions are held by reference, the stored object is already the one being mutated
         session.last_active = datetime.utcnow()
-        cls._sessions[session.session_id] = session
-        cls.get_logger().debug(
-            f"Updated session | session_id: {session.session_id} | current_wagon: {session.current_wagon.wagon_id}"
+        cls._logger.debug(
+            "Updated session | session_id: %s | current_wagon: %s",
+            session.session_id, session.current_wagon.wagon_id,
         )
 
     @classmethod
@@ -60,38 +80,43 @@ class SessionService(LoggerMixin):
         """Add a message to a character's conversation"""
         session = cls.get_session(session_id)
         if not session:
-            cls.get_logger().error(
-                f"Failed to add message - session not found | session_id: {session_id} | uid: {uid}"
+            cls._logger.error(
+                "Failed to add message - session not found | session_id: %s | uid: %s",
+                session_id, uid,
             )
             return None
 
         # get the wagon id from the uid
         # uuid is in the format of wagon-<i>-player-<k>
-        wagon_id = int(uid.split("-")[1])
+        wagon_id = parse_wagon_id(uid)
         # check if the wagon id is the same as the current wagon id
         # if the wagon id is not the same, client is trying to access a different wagon
         # which might indicate out of sync in wagon.
         if wagon_id != session.current_wagon.wagon_id:
-            cls.get_logger().error(
-                f"Cannot add message - wrong wagon | session_id: {session_id} | uid: {uid} | current_wagon: {session.current_wagon.wagon_id}"
+            cls._logger.error(
+                "Cannot add message - wrong wagon | session_id: %s | uid: %s | current_wagon: %s",
+                session_id, uid, session.current_wagon.wagon_id,
             )
             return None
 
-        # in case we have not started a conversation with this character yet, start one
-        if uid not in session.current_wagon.conversations:
-            cls.get_logger().info(
-                f"Starting new conversation | session_id: {session_id} | uid: {uid} | wagon_id: {wagon_id}"
+        # the conversation usually exists already, so a single lookup covers the common case
+        conversations = session.current_wagon.conversations
+        try:
+            conversation = conversations[uid]
+        except KeyError:
+            # in case we have not started a conversation with this character yet, start one
+            cls._logger.info(
+                "Starting new conversation | session_id: %s | uid: %s | wagon_id: %s",
+                session_id, uid, wagon_id,
             )
-            session.current_wagon.conversations[uid] = Conversation(uid=uid)
+            conversation = conversations[uid] = Conversation(uid=uid)
 
         # add the message of the client to the conversation with the new player
-        conversation = session.current_wagon.conversations[uid]
-        conversation.messages.append(message)
-        conversation.last_interaction = datetime.utcnow()
-
-        cls.update_session(session)
-        cls.get_logger().debug(
-            f"Added message to conversation | session_id: {session_id} | uid: {uid} | message_role: {message.role} | message_length: {len(message.content)}"
+        conversation.append(message)
+        # last_active was already refreshed by get_session for this request
+        cls._logger.debug(
+            "Added message to conversation | session_id: %s | uid: %s | message_role: %s | message_length: %d",
+            session_id, uid, message.role, len(message.content),
         )
         return conversation
 
@@ -100,43 +125,49 @@ class SessionService(LoggerMixin):
         """Get a conversation with a specific character"""
         session = cls.get_session(session_id)
         if not session:
-            cls.get_logger().error(
-                f"Failed to get conversation - session not found | session_id: {session_id} | uid: {uid}"
+            cls._logger.error(
+                "Failed to get conversation - session not found | session_id: %s | uid: %s",
+                session_id, uid,
             )
             return None
 
         # get the wagon id from the uid
         # uuid is in the format of wagon-<i>-player-<k>
 
-        wagon_id = int(uid.split("-")[1])
+        wagon_id = parse_wagon_id(uid)
         # check if the wagon id is the same as the current wagon id
         # if the wagon id is not the same, client is trying to access a different wagon
         # which might indicate out of sync in wagon.
         if wagon_id != session.current_wagon.wagon_id:
-            cls.get_logger().warning(
-                f"Cannot get conversation - wrong wagon | session_id: {session_id} | uid: {uid} | current_wagon: {session.current_wagon.wagon_id}"
+            cls._logger.warning(
+                "Cannot get conversation - wrong wagon | session_id: %s | uid: %s | current_wagon: %s",
+                session_id, uid, session.current_wagon.wagon_id,
             )
             return None
 
         # get the conversation from the current wagon
         conversation = session.current_wagon.conversations.get(uid)
 
-        if conversation:
-            cls.get_logger().debug(
-                f"Retrieved conversation | session_id: {session_id} | uid: {uid} | message_count: {len(conversation.messages)}"
-            )
-        else:
-            cls.get_logger().debug(
-                f"No conversation found | session_id: {session_id} | uid: {uid}"
-            )
+        if cls._logger.isEnabledFor(logging.DEBUG):
+            if conversation:
+                cls._logger.debug(
+                    "Retrieved conversation | session_id: %s | uid: %s | message_count: %d",
+                    session_id, uid, len(conversation.messages),
+                )
+            else:
+                cls._logger.debug(
+                    "No conversation found | session_id: %s | uid: %s",
+                    session_id, uid,
+                )
         return conversation
 
     @classmethod
     def get_guessing_progress(cls, session_id: str) -> GuessingProgress:
         session = cls.get_session(session_id)
         if not session:
-            cls.get_logger().error(
-                f"Failed to get guesses - session not found | session_id: {session_id}"
+            cls._logger.error(
+                "Failed to get guesses - session not found | session_id: %s",
+                session_id,
             )
             return None
         return session.guessing_progress
@@ -147,103 +178,137 @@ class SessionService(LoggerMixin):
     ) -> None:
         session = cls.get_session(session_id)
         if not session:
-            cls.get_logger().error(
-                f"Failed to get the guessing progress - session not found | session_id: {session_id}"
+            cls._logger.error(
+                "Failed to get the guessing progress - session not found | session_id: %s",
+                session_id,
             )
             return
 
+        # one timestamp shared by every message recorded for this guess
+        now = session.last_active
+        indication_message = Message(role="user", content=indication, timestamp=now)
+        thought_message = Message(role="assistant", content=thought[0], timestamp=now)
+
+        # session state is only mutated on the event loop, so no store lock is needed here
         session.guessing_progress.guesses.append(guess)
-        session.guessing_progress.indications.append(
-            Message(
-                role="user",
-                content=indication,
-            )
-        )
+        session.guessing_progress.indications.append(indication_message)
 
-        wagon_id = session.current_wagon.wagon_id
+        # the key is formatted once and the conversation fetched with a single lookup
+        key = f"wagon-{session.current_wagon.wagon_id}-player-0"
+        conversations = session.current_wagon.conversations
+        conversation = conversations.get(key)
+        if conversation is None:
+            conversation = conversations[key] = Conversation(uid="player-0")
 
-        if (
-            session.current_wagon.conversations.get(f"wagon-{wagon_id}-player-0")
-            is None
-        ):
-            session.current_wagon.conversations[f"wagon-{wagon_id}-player-0"] = (
-                Conversation(uid="player-0")
-            )
+        conversation.append(indication_message)
+        conversation.append(thought_message)
 
-        messages = session.current_wagon.conversations.get(
-            f"wagon-{wagon_id}-player-0"
-        ).messages
+        cls._logger.info("Added a new guess | session_id: %s", session_id)
 
-        messages.append(Message(role="user", content=indication))
-        messages.append(Message(role="assistant", content=thought[0]))
+    @classmethod
+    async def advance_wagon_async(cls, session_id: str) -> bool:
+        """Advance to the next wagon without blocking the event loop on the wagons file"""
+        cls._logger.info("Attempting to advance wagon | session_id=%s", session_id)
+        session = cls.get_session(session_id)
+        if not session:
+            cls._logger.error("Failed to advance wagon - session not found | session_id=%s", session_id)
+            return False
 
-        cls.update_session(session)
-        cls.get_logger().info(f"Added a new guess | session_id: {session_id}")
+        # only the stat and a possible cold parse of wagons.json run in a worker thread, the session
+        # itself is mutated back on the event loop like everywhere else
+        try:
+            wagons = await asyncio.to_thread(FileManager.load_wagons, session_id, session.default_game)
+        except FileNotFoundError as e:
+            cls._logger.error(
+                "Failed to load session data | session_id=%s | error=%s | error_type=FileNotFoundError",
+                session_id, e,
+            )
+            return False
+        except Exception as e:
+            # e.g. a corrupt wagons.json, reported as a failed advance like in advance_wagon
+            cls._logger.error(
+                "Unexpected error during wagon advancement | session_id=%s | error=%s | error_type=%s",
+                session_id, e, type(e).__name__,
+            )
+            return False
+        return cls._advance_session(session, wagons)
 
     @classmethod
     def advance_wagon(cls, session_id: str) -> bool:
         """Advance to the next wagon"""
-        cls.get_logger().info(f"Attempting to advance wagon | session_id={session_id}")
+        cls._logger.info("Attempting to advance wagon | session_id=%s", session_id)
         
         # Get current session
         session = cls.get_session(session_id)
         if not session:
-            cls.get_logger().error(f"Failed to advance wagon - session not found | session_id={session_id}")
+            cls._logger.error("Failed to advance wagon - session not found | session_id=%s", session_id)
             return False
+        return cls._advance_session(session)
 
+    @classmethod
+    def _advance_session(cls, session: UserSession, wagons: Optional[Any] = None) -> bool:
+        """Move an already fetched session to its next wagon, loading the wagons file unless it was passed in"""
+        session_id = session.session_id
         current_wagon_id = session.current_wagon.wagon_id
-        cls.get_logger().debug(f"Current wagon state | session_id={session_id} | current_wagon_id={current_wagon_id}")
+        cls._logger.debug("Current wagon state | session_id=%s | current_wagon_id=%s", session_id, current_wagon_id)
 
         try: 
             # Load data based on default_game flag
-            cls.get_logger().debug(f"Loading session data | session_id={session_id} | default_game={session.default_game}")
+            cls._logger.debug("Loading session data | session_id=%s | default_game=%s", session_id, session.default_game)
             next_wagon_id = current_wagon_id + 1
-            _, _, wagons = FileManager.load_session_data(session_id, session.default_game)
+            if wagons is None:
+                wagons = FileManager.load_wagons(session_id, session.default_game)
             max_wagons = len(wagons)
 
              # Check if we're at the last wagon
             if next_wagon_id > max_wagons - 1:
-                cls.get_logger().warning(
-                    f"Cannot advance - already at last wagon | session_id={session_id} | current_wagon={current_wagon_id} | max_wagons={max_wagons}"
+                cls._logger.warning(
+                    "Cannot advance - already at last wagon | session_id=%s | current_wagon=%s | max_wagons=%s",
+                    session_id, current_wagon_id, max_wagons,
                 )
                 raise Exception("Cannot advance - already at last wagon")
             
-            cls.get_logger().debug(
-                f"Wagon progression details | session_id={session_id} | current_wagon={current_wagon_id} | next_wagon={next_wagon_id} | max_wagons={max_wagons}"
+            cls._logger.debug(
+                "Wagon progression details | session_id=%s | current_wagon=%s | next_wagon=%s | max_wagons=%s",
+                session_id, current_wagon_id, next_wagon_id, max_wagons,
             )
 
             # Load current wagon data for the next wagon setup
             current_wagon = wagons[next_wagon_id]
             
-            # Set up next wagon
-            session.current_wagon = WagonProgress(
-                wagon_id=next_wagon_id,
-                theme=current_wagon["theme"],
-                password=current_wagon["passcode"],
-            )
+            # Set up next wagon, reusing the existing progress objects instead of allocating new ones
+            wagon_progress = session.current_wagon
+            wagon_progress.wagon_id = next_wagon_id
+            wagon_progress.theme = current_wagon["theme"]
+            wagon_progress.password = current_wagon["passcode"]
+            wagon_progress.conversations.clear()
 
             # Reset guessing progress for new wagon
-            session.guessing_progress = GuessingProgress()
-            cls.update_session(session)
+            session.guessing_progress.guesses.clear()
+            session.guessing_progress.indications.clear()
 
-            cls.get_logger().info(
-                f"Successfully advanced to next wagon | session_id={session_id} | previous_wagon={current_wagon_id} | new_wagon={next_wagon_id} | theme={current_wagon['theme']}"
+            cls._logger.info(
+                "Successfully advanced to next wagon | session_id=%s | previous_wagon=%s | new_wagon=%s | theme=%s",
+                session_id, current_wagon_id, next_wagon_id, current_wagon['theme'],
             )
             return True
 
         except FileNotFoundError as e:
-            cls.get_logger().error(
-                f"Failed to load session data | session_id={session_id} | error={str(e)} | error_type=FileNotFoundError"
+            cls._logger.error(
+                "Failed to load session data | session_id=%s | error=%s | error_type=FileNotFoundError",
+                session_id, e,
             )
             return False
         except KeyError as e:
-            cls.get_logger().error(
-                f"Invalid wagon data structure | session_id={session_id} | error={str(e)} | error_type=KeyError"
+            cls._logger.error(
+                "Invalid wagon data structure | session_id=%s | error=%s | error_type=KeyError",
+                session_id, e,
             )
             return False
         except Exception as e:
-            cls.get_logger().error(
-                f"Unexpected error during wagon advancement | session_id={session_id} | error={str(e)} | error_type={type(e).__name__}"
+            cls._logger.error(
+                "Unexpected error during wagon advancement | session_id=%s | error=%s | error_type=%s",
+                session_id, e, type(e).__name__,
             )
             return False
 
@@ -253,21 +318,28 @@ class SessionService(LoggerMixin):
         current_time = datetime.utcnow()
         sessions_to_remove = []
 
-        for session_id, session in cls._sessions.items():
-            age = (current_time - session.last_active).total_seconds() / 3600
-            if age > max_age_hours:
+        with cls._lock:
+            # sessions are kept in last-access order, so the scan stops at the first recent one
+            for session_id, session in cls._sessions.items():
+                age = (current_time - session.last_active).total_seconds() / 3600
+                if age <= max_age_hours:
+                    break
                 sessions_to_remove.append(session_id)
-                cls.get_logger().info(
-                    f"Marking session for cleanup | session_id: {session_id} | age_hours: {age}"
+                cls._logger.info(
+                    "Marking session for cleanup | session_id: %s | age_hours: %s",
+                    session_id, age,
                 )
-
+            for session_id in sessions_to_remove:
+                del cls._sessions[session_id]
         for session_id in sessions_to_remove:
-            cls.terminate_session(session_id)
-            cls.get_logger().info(f"Cleaned up old session | session_id: {session_id}")
+            cls._logger.info("Cleaned up old session | session_id: %s", session_id)
 
     @classmethod
     def terminate_session(cls, session_id: str) -> None:
         """Terminate a session and clean up its resources"""
-        if session_id in cls._sessions:
-            del cls._sessions[session_id]
-            cls.get_logger().info(f"Terminated session: {session_id}")
+        with cls._lock:
+            removed = cls._sessions.pop(session_id, None)
+        if removed is None:
+            cls._logger.warning("Cannot terminate - session not found: %s", session_id)
+            return
+        cls._logger.info("Terminated session: %s", session_id)
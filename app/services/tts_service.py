@@ -1,9 +1,9 @@
 from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
 from elevenlabs import play
+from app.core.http import get_elevenlabs_client
 from app.core.logging import LoggerMixin
 import os
-import io
+from typing import Iterator
 
 load_dotenv()
 
@@ -14,19 +14,18 @@ class TTSService(LoggerMixin):
             self.logger.error("ELEVEN_LABS_API_KEY not found in environment variables")
             raise ValueError("ELEVEN_LABS_API_KEY is required")
             
-        self.client = ElevenLabs(api_key=self.api_key)
+        # Shared client, reusing the process-wide connection pool instead of a TLS handshake per instance
+        self.client = get_elevenlabs_client()
 
-    def convert_text_to_speech(self, text: str) -> bytes:
-        """Convert text to speech using ElevenLabs"""
-        audio_stream = self.client.text_to_speech.convert(
+    def stream_text_to_speech(self, text: str, output_format: str = "pcm_22050") -> Iterator[bytes]:
+        """Yield audio chunks as ElevenLabs produces them, raw PCM by default so each chunk is playable"""
+        yield from self.client.text_to_speech.convert(
             text=text,
             voice_id="JBFqnCBsd6RMkjVDRZzb",
             model_id="eleven_multilingual_v2",
-            output_format="mp3_44100_128",
+            output_format=output_format,
         )
-        
-        # Convert the generator to bytes
-        buffer = io.BytesIO()
-        for chunk in audio_stream:
-            buffer.write(chunk)
-        return buffer.getvalue()
+
+    def convert_text_to_speech(self, text: str) -> bytes:
+        """Convert text to speech using ElevenLabs"""
+        return b"".join(self.stream_text_to_speech(text, output_format="mp3_44100_128"))
@@ -1,28 +1,34 @@
 from pathlib import Path
-import json
+import asyncio
+import mmap
+import orjson
 import shutil
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
 from app.core.logging import LoggerMixin
+from app.utils.cache import LRUCache
 
 class FileManager(LoggerMixin):
     BASE_DATA_DIR = Path("data")
     DEFAULT_DIR = BASE_DATA_DIR / "default"
+    # parsed wagons.json per path, tagged with the file's mtime so a rewritten file is reloaded
+    _wagons_cache = LRUCache(256)
+    # files from this size on are memory-mapped instead of copied into a bytes object
+    MMAP_THRESHOLD = 16 * 1024
+    # default game data, shared read-only by every default session
+    _default_data: Optional[tuple[Dict, Dict, Dict]] = None
+    _default_lock = threading.Lock()
     
-    @classmethod
-    def ensure_directories(cls) -> None:
-        """Ensure all required directories exist"""
-        cls.BASE_DATA_DIR.mkdir(exist_ok=True)
-        cls.DEFAULT_DIR.mkdir(exist_ok=True)
-
     @classmethod
     def create_session_directory(cls, session_id: str) -> Path:
         """Create a new directory for the session"""
         session_dir = cls.BASE_DATA_DIR / session_id
-        session_dir.mkdir(exist_ok=True)
+        # one call creates the data directory too if it is missing
+        session_dir.mkdir(parents=True, exist_ok=True)
         return session_dir
 
     @classmethod
-    def save_session_data(cls, session_id: str, names: Dict, player_details: Dict, wagons: Dict) -> None:
+    async def save_session_data(cls, session_id: str, names: Dict, player_details: Dict, wagons: Dict) -> None:
         """Save the three main data files for a session"""
         session_dir = cls.create_session_directory(session_id)
         logger = cls.get_logger()
@@ -34,10 +40,15 @@ class FileManager(LoggerMixin):
             "wagons.json": wagons
         }
         
-        for filename, data in files_to_save.items():
-            file_path = session_dir / filename
-            cls.save_json(file_path, data)
-            logger.info(f"Saved session data | session_id={session_id} | filename={filename} | path={file_path}")
+        # The files are independent, so they are written concurrently off the event loop
+        await asyncio.gather(
+            *(
+                asyncio.to_thread(cls.save_json, session_dir / filename, data)
+                for filename, data in files_to_save.items()
+            )
+        )
+        for filename in files_to_save:
+            logger.info("Saved session data | session_id=%s | filename=%s | path=%s/%s", session_id, filename, session_dir, filename)
 
     @classmethod
     def get_data_directory(cls, session_id: str, default_game: bool) -> Path:
@@ -49,11 +60,26 @@ class FileManager(LoggerMixin):
     @classmethod
     def load_session_data(cls, session_id: str, default_game: bool = True) -> tuple[Dict, Dict, Dict]:
         """Load all data files for a session"""
+        if default_game:
+            return cls._load_default_data()
+        return cls._read_session_data(session_id, default_game)
+
+    @classmethod
+    def _load_default_data(cls) -> tuple[Dict, Dict, Dict]:
+        """The default game never changes at runtime, so it is read from disk once per process"""
+        if cls._default_data is None:
+            with cls._default_lock:
+                if cls._default_data is None:
+                    cls._default_data = cls._read_session_data("default", True)
+        return cls._default_data
+
+    @classmethod
+    def _read_session_data(cls, session_id: str, default_game: bool) -> tuple[Dict, Dict, Dict]:
         logger = cls.get_logger()
         data_dir = cls.get_data_directory(session_id, default_game)
         
         if not data_dir.exists():
-            logger.error(f"Data directory not found | session_id={session_id} | directory={data_dir}")
+            logger.error("Data directory not found | session_id=%s | directory=%s", session_id, data_dir)
             raise FileNotFoundError(f"No data found for session {session_id}")
 
         try:
@@ -62,24 +88,49 @@ class FileManager(LoggerMixin):
             wagons = cls.load_json(data_dir / "wagons.json")
             
             logger.info(
-                f"Loaded session data | session_id={session_id} | "
-                f"source={'default' if default_game else 'session'} | "
-                f"directory={data_dir}"
+                "Loaded session data | session_id=%s | source=%s | directory=%s",
+                session_id, "default" if default_game else "session", data_dir,
             )
             return names, player_details, wagons
             
         except FileNotFoundError as e:
-            logger.error(f"Failed to load files | session_id={session_id} | directory={data_dir} | error={str(e)}")
+            logger.error("Failed to load files | session_id=%s | directory=%s | error=%s", session_id, data_dir, e)
             raise FileNotFoundError(f"Missing required data files in {data_dir}")
 
+    @classmethod
+    def load_raw(cls, session_id: str, filename: str, default_game: bool = True) -> bytes:
+        """Read one data file as raw JSON bytes, for responses that forward it unchanged"""
+        file_path = cls.get_data_directory(session_id, default_game) / filename
+        try:
+            return file_path.read_bytes()
+        except FileNotFoundError:
+            cls.get_logger().error("Data file not found | session_id=%s | path=%s", session_id, file_path)
+            raise FileNotFoundError(f"No data found for session {session_id}")
+
+    @classmethod
+    def load_wagons(cls, session_id: str, default_game: bool = True) -> Any:
+        """Load only the wagons file for a session, parsed once per file version"""
+        wagons_file = cls.get_data_directory(session_id, default_game) / "wagons.json"
+        mtime = wagons_file.stat().st_mtime_ns
+        cached = cls._wagons_cache.get(wagons_file)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        wagons = cls.load_json(wagons_file)
+        cls._wagons_cache.set(wagons_file, (mtime, wagons))
+        return wagons
+
     @staticmethod
     def save_json(file_path: Path, data: Dict[str, Any]) -> None:
         """Save data to a JSON file"""
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        # serialized in one call and written with a single write
+        file_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
 
-    @staticmethod
-    def load_json(file_path: Path) -> Dict:
+    @classmethod
+    def load_json(cls, file_path: Path) -> Dict:
         """Load data from a JSON file"""
-        with open(file_path, 'r') as f:
-            return json.load(f) 
\ No newline at end of file
+        # small files are cheapest to read in one go, larger ones are parsed straight from the page cache
+        if file_path.stat().st_size < cls.MMAP_THRESHOLD:
+            return orjson.loads(file_path.read_bytes())
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view) 
\ No newline at end of file
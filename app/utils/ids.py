@@ -0,0 +1,7 @@
+_WAGON_PREFIX_LEN = len("wagon-")
+
+
+def parse_wagon_id(uid: str) -> int:
+    """Wagon index from ids like wagon-<i> or wagon-<i>-player-<k>, raises ValueError if malformed"""
+    # slicing and partition avoid building the full split list on every chat message
+    return int(uid[_WAGON_PREFIX_LEN:].partition("-")[0])